@@ -1,38 +1,114 @@
-import json
+import argparse
 import ast
+import mmap
+import os
+import tempfile
+from operator import itemgetter
+import ijson
+import orjson
 
 EMBEDDINGS_JSON_PATH = "vectors.txt" # Make sure this matches your file name
 
 OUTPUT_ENRICHED_JSON_PATH = "ucr_courses_data_with_embeddings.json"
 
+MMAP_THRESHOLD = 10 * 1024 * 1024 # Smaller files are cheaper to read than to map
+
+def _loads_file(f):
+    """Decodes an open binary JSON file, memory-mapping it when it is large."""
+    if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            pass # mmap unavailable for this file/platform; fall back to a plain read
+        else:
+            with mm, memoryview(mm) as buf:
+                return orjson.loads(buf)
+    return orjson.loads(f.read())
+
 def load_json_data(file_path):
     """Loads JSON data from a file."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(file_path, 'rb') as f:
+            data = _loads_file(f)
         print(f"Successfully loaded {len(data)} records from JSON: {file_path}")
         return data
     except FileNotFoundError:
         print(f"Error: JSON file not found at {file_path}")
         return None
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         print(f"Error: Could not decode JSON from {file_path}. Check file format.")
         return None
     except Exception as e:
         print(f"An unexpected error occurred while loading {file_path}: {e}")
         return None
 
+def _is_python_literal(head):
+    """True if the first quoted string in `head` uses single quotes (str(list) dump)."""
+    quotes = [i for i in (head.find(b'"'), head.find(b"'")) if i >= 0]
+    return bool(quotes) and head[min(quotes):min(quotes) + 1] == b"'"
+
+def _read_python_literal(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return ast.literal_eval(f.read())
+
+def migrate_embeddings_txt(file_path):
+    """
+    One-shot rewrite of a stringified Python list into JSON so it can be
+    streamed (run with --migrate). The JSON is written to a temp file next to
+    the original and swapped in with os.replace, so a failure part-way leaves
+    the original untouched.
+    """
+    data = _read_python_literal(file_path)
+    payload = orjson.dumps(data)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    print(f"Migrated {len(data)} embeddings in {file_path} from Python literal to JSON.")
+
+def _stream_pairs(f, file_path):
+    """
+    Yields (course_id, embedding) for each top-level list item of an open JSON
+    file, closing it when done. Each parsed record is dropped as soon as its
+    two fields are taken, so only the embeddings themselves stay alive.
+    """
+    # Every record written by vector_embeddings.py carries both keys, so index
+    # directly and let a missing one surface as KeyError in the consumer
+    get = itemgetter('course_id', 'embedding')
+    with f:
+        try:
+            for item in ijson.items(f, 'item', use_float=True):
+                yield get(item)
+        except ijson.JSONError as e:
+            print(f"Error: Could not decode JSON from {file_path}. Check TXT file format.")
+            print(f"Details: {e}")
+            # Re-raise so a truncated file never passes for a complete (but shorter) one
+            raise
+
 def load_embeddings_from_txt(file_path):
     """
-    Loads embeddings data from a TXT file containing a stringified Python list.
+    Streams embeddings data from a TXT file containing a JSON list of dicts.
+    Returns an iterator of (course_id, embedding) pairs, so the map can be
+    built while the file is still being parsed. Older dumps holding a
+    stringified Python list are read whole, as before; the file itself is
+    never modified here (see migrate_embeddings_txt).
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            # Safely evaluate the string as a Python literal (list of dicts)
-            data = ast.literal_eval(content)
-        print(f"Successfully loaded {len(data)} embeddings from TXT: {file_path}")
-        return data
+        with open(file_path, 'rb') as f:
+            head = f.read(256)
+        if _is_python_literal(head):
+            data = _read_python_literal(file_path)
+            print(f"Loaded {len(data)} embeddings from Python-literal TXT: {file_path}")
+            print("Run with --migrate once to convert it to JSON and stream it from then on.")
+            get = itemgetter('course_id', 'embedding')
+            return (get(item) for item in data)
+        f = open(file_path, 'rb')
+        print(f"Streaming embeddings from TXT: {file_path}")
+        return _stream_pairs(f, file_path)
     except FileNotFoundError:
         print(f"Error: Embeddings TXT file not found at {file_path}")
         return None
@@ -45,24 +121,43 @@ def load_embeddings_from_txt(file_path):
         return None
 
 def merge_embeddings_into_courses(embeddings_data):
-
-    if not embeddings_data:
+    """Builds {course_id: embedding} from an iterable of (course_id, embedding) pairs."""
+    if embeddings_data is None:
+        print("No embeddings data provided. Returning original course data without embeddings.")
+        return []
+    try:
+        embeddings_map = dict(embeddings_data)
+    except KeyError as e:
+        print(f"Error: An embedding record is missing the {e} field. Check TXT file format.")
+        return []
+    except ijson.JSONError:
+        print("Aborting: the embeddings file could not be read completely.")
+        return []
+    if not embeddings_map:
         print("No embeddings data provided. Returning original course data without embeddings.")
         return []
-    embeddings_map = {item['course_id']: item['embedding'] for item in embeddings_data if 'course_id' in item and 'embedding' in item}
-    
+    print(f"Successfully loaded {len(embeddings_map)} embeddings.")
+
     return embeddings_map
 
 def save_json_data(data, file_path):
     """Saves data to a JSON file."""
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4) # Use indent for pretty printing
+        with open(file_path, 'wb') as f:
+            f.write(orjson.dumps(data)) # Compact: this file is only read by mongoUpload.py
         print(f"Successfully saved merged data to {file_path}")
     except Exception as e:
         print(f"Error saving data to {file_path}: {e}")
 
 if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Merge vectors.txt into the enriched embeddings JSON file.")
+    p.add_argument("--migrate", action="store_true",
+                   help=f"rewrite a Python-literal {EMBEDDINGS_JSON_PATH} as JSON and exit")
+    args = p.parse_args()
+    if args.migrate:
+        migrate_embeddings_txt(EMBEDDINGS_JSON_PATH)
+        raise SystemExit
+
     print("Starting data merge process...")
 
     # 2. Load the list of embeddings
@@ -8,26 +8,55 @@ chatbot.py  –  CS-major aware
       b) if slots remain, pulls tech electives / breadth courses
 """
 
-import json, pathlib, sys, textwrap
+import mmap, os, pathlib, pickle, sys, textwrap
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Set
 
+import orjson
+
 from scheduler import build_schedule
 from courseRanking import rank_courses   # needs rank_courses() refactor
 
 # ── file locations ───────────────────────────────────────────────────
 COURSE_JSON = pathlib.Path("ucr_courses_data.json")
+COURSE_PKL  = pathlib.Path("ucr_courses_data.pkl")   # cache written by clean_data.py
 PLAN_FILE   = pathlib.Path("cs_course_plan.json")
+MMAP_THRESHOLD = 10 * 1024 * 1024   # smaller files are cheaper to read than to map
 
 if not COURSE_JSON.exists():
     sys.exit(f"❌ Course file not found: {COURSE_JSON}")
 if not PLAN_FILE.exists():
     sys.exit(f"❌ Plan file not found: {PLAN_FILE}")
 
-sections: List[Dict[str, Any]] = json.load(open(COURSE_JSON))
-plan             = json.load(open(PLAN_FILE))
-plan_courses     = {c.strip().upper() for q in plan["plan_by_quarter"] for c in q}
-tech_electives   = {c.strip().upper() for c in plan.get("tech_elective_pool", [])}
-breadth_pool     = {c.strip().upper() for c in plan.get("engr_breadth_pool", [])}
+def load_json(path: pathlib.Path) -> Any:
+    """orjson-decode `path`, memory-mapping it when it is large."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                pass   # mmap unavailable here → plain read below
+            else:
+                with mm, memoryview(mm) as buf:
+                    return orjson.loads(buf)
+        return orjson.loads(f.read())
+
+def load_sections() -> List[Dict[str, Any]]:
+    """Sections from the pickle cache when it is at least as new as the JSON."""
+    if COURSE_PKL.exists() and COURSE_PKL.stat().st_mtime >= COURSE_JSON.stat().st_mtime:
+        with open(COURSE_PKL, "rb") as f:
+            return pickle.load(f)
+    return load_json(COURSE_JSON)
+
+# Decode the (large) course file on a worker thread; it is only needed at
+# build_schedule time, so it overlaps the prompts and the ranking call below
+loader           = ThreadPoolExecutor(max_workers=2)
+sections_job     = loader.submit(load_sections)
+plan             = loader.submit(load_json, PLAN_FILE).result()
+# plan file is stored pre-normalized (upper-case, no spaces) → no per-entry cleanup
+plan_courses     = {c for q in plan["plan_by_quarter"] for c in q}
+tech_electives   = set(plan.get("tech_elective_pool", []))
+breadth_pool     = set(plan.get("engr_breadth_pool", []))
 
 print("🤖  Welcome to UCR Schedule Bot (CS major)")
 completed: Set[str] = {
@@ -37,7 +66,7 @@ desired_load = int(input("How many courses this quarter? "))
 pref_query   = input("Any day/time/topic preferences (optional): ")
 
 # ─── Phase 1: required plan courses ──────────────────────────────────
-core_needed = [c for c in plan_courses if c not in completed]
+core_needed = list(plan_courses - completed)
 
 ranked_core = rank_courses(
     courses_taken=list(completed),
@@ -47,6 +76,8 @@ ranked_core = rank_courses(
 )
 wish_scores = {d["course_id"]: d["score"] for d in ranked_core}
 
+sections: List[Dict[str, Any]] = sections_job.result()
+loader.shutdown()
 schedule = build_schedule(sections, wish_scores, completed, desired_load)
 
 # ─── Phase 2: fill with electives / breadth if still short ───────────
@@ -83,17 +114,18 @@ print("\n🗓️  Final schedule")
 if not schedule:
     sys.exit("Could not build a valid schedule with given constraints.")
 
+# bit i of the index ↔ i-th letter of "MTWRF" → e.g. 0b10101 = "MWF"
+DAY_STRINGS = ["".join(l for i, l in enumerate("MTWRF") if n >> i & 1) or "TBA"
+               for n in range(32)]
+
 def day_flags_to_str(sec: Dict[str, Any]) -> str:
-    return "".join(
-        l for l, flag in zip(
-            "MTWRF",
-            [sec["meeting_meetingMonday"],
-             sec["meeting_meetingTuesday"],
-             sec["meeting_meetingWednesday"],
-             sec["meeting_meetingThursday"],
-             sec["meeting_meetingFriday"]]
-        ) if flag
-    ) or "TBA"
+    return DAY_STRINGS[
+        bool(sec["meeting_meetingMonday"])
+        | bool(sec["meeting_meetingTuesday"])   << 1
+        | bool(sec["meeting_meetingWednesday"]) << 2
+        | bool(sec["meeting_meetingThursday"])  << 3
+        | bool(sec["meeting_meetingFriday"])    << 4
+    ]
 
 for s in schedule:
     days  = day_flags_to_str(s)
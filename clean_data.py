@@ -1,49 +1,150 @@
 import pandas as pd
-import json
 import ast # Used for safely evaluating strings containing Python literal structures
+import json
+import os
+import pickle
+import re
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+
+import orjson
+
+# Rows per read_csv chunk; each chunk is flattened and written out on its own
+CHUNK_ROWS = 50_000
+# Processes parsing the stringified faculty/meetingsFaculty cells of a chunk
+PARSE_WORKERS = os.cpu_count() or 1
+
+# Flattened meetingTime fields, in output column order (each gets a 'meeting_' prefix)
+MEETING_COLUMNS = (
+    "meetingBeginTime",
+    "meetingEndTime",
+    "meetingBuildingDescription",
+    "meetingRoom",
+    "meetingMonday",
+    "meetingTuesday",
+    "meetingWednesday",
+    "meetingThursday",
+    "meetingFriday",
+    "meetingSaturday",
+    "meetingSunday",
+    "meetingStartDate",
+    "meetingEndDate",
+    "meetingTypeDescription",
+)
+
+# The scraped faculty/meetingsFaculty cells are Python reprs (single quotes,
+# True/False/None). Rewriting those tokens turns a cell into JSON that orjson
+# parses in C, which is much cheaper than building an AST per cell. Strings are
+# matched whole, so quotes or "True" inside them are left alone.
+_PY_TOKEN = re.compile(r"'((?:[^'\\]|\\.)*)'|\"(?:[^\"\\]|\\.)*\"|\b(True|False|None)\b")
+_PY_CONST = {'True': 'true', 'False': 'false', 'None': 'null'}
+
+def _py_token_to_json(m):
+    single, const = m.group(1), m.group(2)
+    if const:
+        return _PY_CONST[const]
+    if single is None:
+        return m.group(0)   # double-quoted string is already JSON
+    return '"' + single.replace("\\'", "'").replace('"', '\\"') + '"'
 
 def process_prerequisites(prereq_string: str):
-        prereq_string = str(prereq_string)
+        # str() first: NaN cells hash by identity and would never hit the cache
+        return _split_prerequisites(str(prereq_string))
+
+
+# Only a few hundred distinct prerequisite strings exist across ~10k sections
+# (most are "nan"), so each is split once and the result shared
+@lru_cache(maxsize=None)
+def _split_prerequisites(prereq_string: str):
         if prereq_string == "none":
             return []
 
         # Step 1: Split by " AND " first. Each part resulting from this split
         # represents a group of prerequisites that must ALL be met.
-        and_parts = [part.strip() for part in prereq_string.split(" AND ")]
-        parsed_prereqs = []
+        # Step 2: Within each "AND" part, split by " OR ".
+        # These are the individual courses that can satisfy this specific "AND" condition.
+        # Each inner list represents an "OR" group
+        return [[course.strip() for course in and_part.strip().split(" OR ")]
+                for and_part in prereq_string.split(" AND ")]
+
+
+
+def safe_literal_eval(val):
+    """Parses one stringified faculty/meetingsFaculty cell (None if empty)."""
+    try:
+        if pd.isna(val) or val == '':
+            return None
+        try:
+            return orjson.loads(_PY_TOKEN.sub(_py_token_to_json, val))
+        except orjson.JSONDecodeError:
+            # Tuples, \x escapes, ... are not expressible as JSON
+            return ast.literal_eval(val)
+    except (ValueError, SyntaxError) as e:
+        return str(val) if not pd.isna(val) else None
 
-        for and_part in and_parts:
-            # Step 2: Within each "AND" part, split by " OR ".
-            # These are the individual courses that can satisfy this specific "AND" condition.
-            or_group = [course.strip() for course in and_part.split(" OR ")]
-            parsed_prereqs.append(or_group) # Each inner list now represents an "OR" group
-        return parsed_prereqs
 
+def _shared(val):
+    """Interned copy of a string value (anything else as is)."""
+    return sys.intern(val) if isinstance(val, str) else val
 
 
-def generate_course_json(csv_file_path):
+def extract_meeting_details(meetings_list):
+    """One tuple per meeting, ordered like MEETING_COLUMNS."""
+    if not isinstance(meetings_list, list):
+        return []
+    # Banner always nests the schedule under a dict 'meetingTime'. Its string
+    # fields (buildings, dates, "Lecture", times) repeat across thousands of
+    # meetings, so each distinct value is kept once rather than once per cell.
+    return [(
+        _shared(mt.get("beginTime")),
+        _shared(mt.get("endTime")),
+        _shared(mt.get("buildingDescription")),
+        _shared(mt.get("room")),
+        mt.get("monday", False),
+        mt.get("tuesday", False),
+        mt.get("wednesday", False),
+        mt.get("thursday", False),
+        mt.get("friday", False),
+        mt.get("saturday", False),
+        mt.get("sunday", False),
+        _shared(mt.get("startDate")),
+        _shared(mt.get("endDate")),
+        _shared(mt.get("meetingTypeDescription")),
+    ) for mt in [m["meetingTime"] for m in meetings_list]]
+
+
+def parse_cells(faculty_cells, meeting_cells):
+    """
+    Parses a run of faculty/meetingsFaculty cells into the first instructor's
+    (displayName, emailAddress) pair and the meeting tuples of each row.
+    Module-level so worker processes can run it on slices of a chunk.
+    """
+    # Both faculty columns come from the same first-instructor dict, so take them in one pass
+    faculty = []
+    for x in map(safe_literal_eval, faculty_cells):
+        faculty.append((_shared(x[0].get("displayName")), _shared(x[0].get("emailAddress")))
+                       if isinstance(x, list) and x and isinstance(x[0], dict) else (None, None))
+    meetings = [extract_meeting_details(safe_literal_eval(v)) for v in meeting_cells]
+    return faculty, meetings
+
+
+def iter_course_records(csv_file_path, chunksize=CHUNK_ROWS):
     """
-    Loads course data from a CSV, extracts specified fields,
-    parses nested stringified JSON/Python literals, and
-    converts the data into a list of JSON objects, with 'faculty'
-    and 'meetingsFaculty' details flattened into top-level columns.
+    Loads course data from a CSV in chunks, extracts specified fields,
+    parses nested stringified JSON/Python literals, and yields each chunk
+    as a list of course dicts, with 'faculty' and 'meetingsFaculty'
+    details flattened into top-level columns.
 
     Args:
         csv_file_path (str): The path to the input CSV file.
+        chunksize (int): Number of CSV rows parsed per chunk.
 
-    Returns:
-        str: A JSON string containing the extracted course data,
-             or None if an error occurs.
+    Yields:
+        list: The course records of one chunk.
     """
-    try:
-        df = pd.read_csv(csv_file_path)
-    except FileNotFoundError:
-        print(f"Error: CSV file not found at {csv_file_path}")
-        return None
-    except Exception as e:
-        print(f"Error loading CSV: {e}")
-        return None
-
     selected_columns = [
         'subjectCourse', 
         'courseDisplay',
@@ -65,86 +166,144 @@ def generate_course_json(csv_file_path):
         'prerequisites' # Kept as is, assuming no further flattening needed here
     ]
 
-    df_filtered = df[selected_columns].copy()
-
-    def safe_literal_eval(val):
-        try:
-            if pd.isna(val) or val == '':
-                return None
-            return ast.literal_eval(val)
-        except (ValueError, SyntaxError) as e:
-            return str(val) if not pd.isna(val) else None
-    
+    # Only parse the columns we keep; the scraped CSV carries ~40 of them.
+    # Pin the dtypes that per-chunk inference could flip (e.g. a chunk where
+    # every courseNumber looks numeric, or no creditHours is missing).
+    reader = pd.read_csv(
+        csv_file_path,
+        usecols=selected_columns,
+        dtype={'courseNumber': str, 'creditHours': 'float64'},
+        chunksize=chunksize,
+    )
 
+    def column_values(series):
+        """The column as a plain list, NaN -> None only where a NaN actually occurs."""
+        values = series.tolist()
+        if series.hasnans:
+            values = [None if v != v else v for v in values]
+        return values
 
-    # Apply safe_literal_eval to 'faculty' and 'meetingsFaculty'
-    for col in ['faculty', 'meetingsFaculty']:
-        df_filtered[col] = df_filtered[col].apply(safe_literal_eval)
+    keys = [*(c for c in selected_columns if c not in ('faculty', 'meetingsFaculty')),
+            'facultyDisplayName', 'facultyEmailAddress',
+            *(f'meeting_{col}' for col in MEETING_COLUMNS)]
+    no_meeting = [(None,) * len(MEETING_COLUMNS)]
 
-    # Apply the custom process_prerequisites function to the 'prerequisites' column
-    df_filtered['prerequisites'] = df_filtered['prerequisites'].apply(process_prerequisites)
+    # Cell parsing is independent per row, so with several CPUs each chunk is
+    # split across worker processes; on one CPU the pool would only add overhead
+    with ProcessPoolExecutor(PARSE_WORKERS) if PARSE_WORKERS > 1 else nullcontext() as pool:
+        for df in reader:
+            df_filtered = df[selected_columns].copy()
 
-    df_filtered['facultyDisplayName'] = df_filtered['faculty'].apply(
-        lambda x: x[0].get("displayName") if isinstance(x, list) and x and isinstance(x[0], dict) else None
-    )
-    df_filtered['facultyEmailAddress'] = df_filtered['faculty'].apply(
-        lambda x: x[0].get("emailAddress") if isinstance(x, list) and x and isinstance(x[0], dict) else None
-    )
-    df_filtered = df_filtered.drop(columns=['faculty'])
+            # Parse each stringified cell once, iterating the plain Python lists
+            # instead of paying Series.apply's per-row dispatch
+            faculty_cells = df_filtered.pop('faculty').tolist()
+            meeting_cells = df_filtered.pop('meetingsFaculty').tolist()
+            if pool is None:
+                faculty, meetings = parse_cells(faculty_cells, meeting_cells)
+            else:
+                step = max(1, -(-len(faculty_cells) // PARSE_WORKERS))
+                faculty, meetings = [], []
+                for part_faculty, part_meetings in pool.map(
+                        parse_cells,
+                        [faculty_cells[i:i + step] for i in range(0, len(faculty_cells), step)],
+                        [meeting_cells[i:i + step] for i in range(0, len(meeting_cells), step)]):
+                    faculty += part_faculty
+                    meetings += part_meetings
 
+            # Apply the custom process_prerequisites function to the 'prerequisites' column
+            df_filtered['prerequisites'] = [process_prerequisites(v) for v in df_filtered['prerequisites'].tolist()]
 
-    def extract_meeting_details(meetings_list):
-        if not meetings_list:
-            return []
-        processed_meetings = []
-        for m in meetings_list:
-            if isinstance(m, dict) and "meetingTime" in m and isinstance(m["meetingTime"], dict):
-                meeting_time = m["meetingTime"]
-                processed_meetings.append({
-                    "meetingBeginTime": meeting_time.get("beginTime"),
-                    "meetingEndTime": meeting_time.get("endTime"),
-                    "meetingBuildingDescription": meeting_time.get("buildingDescription"),
-                    "meetingRoom": meeting_time.get("room"),
-                    "meetingMonday": meeting_time.get("monday", False),
-                    "meetingTuesday": meeting_time.get("tuesday", False),
-                    "meetingWednesday": meeting_time.get("wednesday", False),
-                    "meetingThursday": meeting_time.get("thursday", False),
-                    "meetingFriday": meeting_time.get("friday", False),
-                    "meetingSaturday": meeting_time.get("saturday", False),
-                    "meetingSunday": meeting_time.get("sunday", False),
-                    "meetingStartDate": meeting_time.get("startDate"),
-                    "meetingEndDate": meeting_time.get("endDate"),
-                    "meetingTypeDescription": meeting_time.get("meetingTypeDescription")
-                })
-        return processed_meetings
+            df_filtered[['facultyDisplayName', 'facultyEmailAddress']] = faculty
 
-    df_filtered['meetingsFaculty'] = df_filtered['meetingsFaculty'].apply(extract_meeting_details)
-    df_filtered['creditHours'] = df_filtered['creditHours'].fillna("None")
+            # One record per meeting (a section without meetings keeps a single record,
+            # like explode does), emitted straight from the column lists instead of
+            # explode + json_normalize + concat + to_dict. That record gets all-None
+            # meeting fields, so no NaN is ever introduced here; the base columns'
+            # NaNs (e.g. a missing creditHours) become None in column_values.
+            base_rows = zip(*(column_values(df_filtered[col]) for col in df_filtered.columns))
+            yield [
+                dict(zip(keys, base + meeting))
+                for base, section_meetings in zip(base_rows, meetings)
+                for meeting in (section_meetings or no_meeting)
+            ]
 
-    df_exploded = df_filtered.explode('meetingsFaculty').reset_index(drop=True)
 
-    df_exploded_final = pd.json_normalize(df_exploded['meetingsFaculty']).add_prefix('meeting_')
+def generate_course_records(csv_file_path):
+    """
+    All records from iter_course_records as one list.
 
+    Returns:
+        list: The extracted course records, or None if an error occurs.
+    """
+    try:
+        return [rec for chunk in iter_course_records(csv_file_path) for rec in chunk]
+    except FileNotFoundError:
+        print(f"Error: CSV file not found at {csv_file_path}")
+        return None
+    except Exception as e:
+        print(f"Error loading CSV: {e}")
+        return None
 
-    if 'meetingsFaculty' in df_exploded.columns:
-        df_exploded = df_exploded.drop(columns=['meetingsFaculty'])
 
-    df_final = pd.concat([df_exploded, df_exploded_final], axis=1)
+def generate_course_json(csv_file_path):
+    """
+    Same as generate_course_records, but returns the records as a JSON string
+    (or None if an error occurs).
+    """
+    course_data = generate_course_records(csv_file_path)
+    if course_data is None:
+        return None
+    return json.dumps(course_data, indent=4)
 
-    df_final = df_final.where(pd.notnull(df_final), None)
 
-    course_data = df_final.to_dict(orient='records')
+def _replace_file(file_path, write):
+    """
+    Calls write(f) on a temp file next to `file_path` and swaps it in with
+    os.replace, so a failure part-way leaves the previous file untouched.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
-    json_output = json.dumps(course_data, indent=4)
 
-    return json_output
+def write_course_json(f, csv_file_path, course_data):
+    """
+    Streams each chunk's records straight into the open file `f` as a JSON
+    array instead of building one json.dumps string of the whole file,
+    appending every record to `course_data` as well.
+    """
+    f.write(b'[')
+    for chunk in iter_course_records(csv_file_path):
+        for rec in chunk:
+            if course_data:
+                f.write(b',')
+            f.write(orjson.dumps(rec))
+            course_data.append(rec)
+    f.write(b']')
 
 
-generated_json = generate_course_json("ucr_courses_202440.csv")
+if __name__ == "__main__":
+    csv_file_path = "ucr_courses_202440.csv"
+    # The list is kept for the pickle cache
+    course_data = []
+    try:
+        _replace_file('ucr_courses_data.json', lambda f: write_course_json(f, csv_file_path, course_data))
+    except FileNotFoundError:
+        print(f"Error: CSV file not found at {csv_file_path}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error loading CSV: {e}")
+        sys.exit(1)
+    print("\nJSON data saved to ucr_courses_data.json")
 
-with open('ucr_courses_data.json', 'w') as f:
-        f.write(generated_json)
-print("\nJSON data saved to ucr_courses_data.json")
+    # Binary cache of the same records so chatbot.py can skip JSON decoding at startup
+    _replace_file('ucr_courses_data.pkl', lambda f: pickle.dump(course_data, f, protocol=5))
+    print("Pickle cache saved to ucr_courses_data.pkl")
 
-print(process_prerequisites("CS010A AND CS011 OR MATH011 AND MATH009C OR MATH09H AND MATH031 OR EE020B"))
-print("\nJSON data saved to ucr_courses_data.json")
+    print(process_prerequisites("CS010A AND CS011 OR MATH011 AND MATH009C OR MATH09H AND MATH031 OR EE020B"))
+    print("\nJSON data saved to ucr_courses_data.json")
@@ -1,5 +1,6 @@
 # ─── prereq_cleaner.py  (minimal) ───
-import pandas as pd
+import csv
+from functools import lru_cache
 
 def extract_prerequisites(prereq_string: str):
     """
@@ -8,12 +9,23 @@ def extract_prerequisites(prereq_string: str):
     """
     if not isinstance(prereq_string, str) or not prereq_string.strip():
         return []
-    return [c.strip() for c in prereq_string.upper().split(" OR ") if c.strip()]
+    return _split_or_group(prereq_string)
 
-# Load the CSV written by scrapper.py
-df = pd.read_csv("ucr_courses_202440.csv")
 
-prereq_filtered_df = df[df['prerequisites'].fillna('').str.strip() != '']
-classes_with_prereqs_count = len(prereq_filtered_df)
+# Many courses share the exact same prereq text, so each distinct string is
+# split once; NaN never gets here, as it hashes by identity and would never hit
+@lru_cache(maxsize=None)
+def _split_or_group(prereq_string: str):
+    # strip each piece once (not once for the test and again for the value)
+    return [c for c in map(str.strip, prereq_string.upper().split(" OR ")) if c]
 
-print(classes_with_prereqs_count)
\ No newline at end of file
+
+if __name__ == "__main__":
+    # Stream the CSV written by scrapper.py row by row; only one column is
+    # looked at, so building a full DataFrame of ~40 columns is wasted work
+    with open("ucr_courses_202440.csv", newline="") as f:
+        classes_with_prereqs_count = sum(
+            1 for row in csv.DictReader(f) if (row["prerequisites"] or "").strip()
+        )
+
+    print(classes_with_prereqs_count)
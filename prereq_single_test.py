@@ -1,42 +1,70 @@
 # ─── prereq_single_test.py  (compatible with new extractor) ───
-import argparse, re, requests
-from bs4 import BeautifulSoup
+import argparse, html as htmllib, re, requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import Dict, List, Any
+from urllib3.util.retry import Retry
+
+import orjson
 
 HEADERS = {"Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"}
+PAGE_SIZE     = 500
+PAGE_WORKERS  = 16    # concurrent page requests; the wait is network, not CPU
 
 def banner_session(term: str) -> requests.Session:
     s = requests.Session()
+    # retry transient 5xx on GETs; the pool is sized for PAGE_WORKERS keep-alive connections
+    adapter = HTTPAdapter(pool_maxsize=PAGE_WORKERS,
+                          max_retries=Retry(total=3, backoff_factor=0.5,
+                                            status_forcelist=(500, 502, 503, 504)))
+    s.mount("https://", adapter)
     s.post("https://registrationssb.ucr.edu/StudentRegistrationSsb/ssb/term/search?mode=search",
            data={"term": term}, headers=HEADERS, timeout=30)
     return s
 
 def banner_sections(s: requests.Session, term: str) -> List[Dict[str, Any]]:
-    """Pull ALL sections for the term (loop every 500 rows)."""
-    sections, offset = [], 0
-    while True:
+    """Pull ALL sections for the term (every 500-row page, fetched concurrently)."""
+    def page(offset: int) -> Dict[str, Any]:
         url = ("https://registrationssb.ucr.edu/StudentRegistrationSsb/ssb/"
                "searchResults/searchResults"
-               f"?txt_term={term}&pageOffset={offset}&pageMaxSize=500"
+               f"?txt_term={term}&pageOffset={offset}&pageMaxSize={PAGE_SIZE}"
                "&sortColumn=subjectDescription&sortDirection=asc")
-        batch = s.get(url, headers=HEADERS, timeout=30).json()["data"]
-        if not batch:
-            break
-        sections.extend(batch)
-        offset += 500
+        return orjson.loads(s.get(url, headers=HEADERS, timeout=30).content)
+
+    # first page tells us the total, then the other offsets go out in parallel
+    first    = page(0)
+    sections = list(first["data"] or [])
+    if not first.get("totalCount"):
+        # no total to plan with, so page until an empty batch as before
+        batch, offset = first["data"], PAGE_SIZE
+        while batch:
+            batch = page(offset)["data"]
+            sections.extend(batch or [])
+            offset += PAGE_SIZE
+        return sections
+    offsets  = range(PAGE_SIZE, first["totalCount"], PAGE_SIZE)
+    with ThreadPoolExecutor(PAGE_WORKERS) as ex:
+        for resp in ex.map(page, offsets):   # map keeps page order
+            sections.extend(resp["data"] or [])
     return sections
 
 # ---------- build name→code map ----------
 def build_desc2code(sections):
-    m = {}
-    for s in sections:
-        code = s["subject"].strip().upper()
-        desc = s["subjectDescription"].strip()
-        if desc:
-            m[re.sub(r"\s+", "", desc.upper())] = code  # 'COMPUTERSCIENCE' → 'CS'
-    return m
+    # ~100 subjects across thousands of sections → normalize each distinct pair once
+    pairs = dict.fromkeys((s["subjectDescription"], s["subject"]) for s in sections)
+    return {"".join(desc.upper().split()): subj.strip().upper()   # 'COMPUTERSCIENCE' → 'CS'
+            for desc, subj in pairs if desc.strip()}
 
 # ---------- new extractor (same as in scrapper) ----------
+# Banner's prereq fragment is a bare table, so dropping the tags is enough;
+# a run of tags and whitespace becomes one space in the same pass
+TEXT_GAP_RE = re.compile(r"(?:<[^>]+>|\s)+")
+# One sweep over the text: either a whitespace-delimited AND/OR, or a
+# "SUBJECT 123A" clause whose subject never runs across such an operator
+TOKEN_RE = re.compile(r"(?<=\s)(AND|OR)(?=\s)"
+                      r"|([A-Z](?:(?!\s(?:AND|OR)\s)[A-Z &])+)\s*(\d{1,4}[A-Z]?)")
+SPACE_RE = re.compile(r"\s+")
+
 def clean_prereqs(sess, term, crn, desc2code, course_code):
     url = ("https://registrationssb.ucr.edu/StudentRegistrationSsb/ssb/"
            f"searchResults/getSectionPrerequisites?term={term}&courseReferenceNumber={crn}")
@@ -44,22 +72,24 @@ def clean_prereqs(sess, term, crn, desc2code, course_code):
     if "No prerequisite information available" in html:
         return "(no prerequisites)"
 
-    text = BeautifulSoup(html, "html.parser").get_text(" ", strip=True).upper()
-    
-    parts = re.split(r"\s+(AND|OR)\s+", text)
-    out   = []
-    clause_re = re.compile(r"([A-Z][A-Z &]{1,})\s*(\d{1,4}[A-Z]?)")
+    # text nodes joined by single spaces, as get_text(" ", strip=True) gave
+    text = TEXT_GAP_RE.sub(" ", html)
+    if "&" in text:    # entities such as &nbsp; can decode to more whitespace
+        text = " ".join(htmllib.unescape(text).split())
+    text = text.strip().upper()
 
-    for part in parts:
-        part = part.strip()
-        if part in ("AND", "OR"):
+    out    = []
+    in_use = False    # a clause was already taken since the last operator
+    for m in TOKEN_RE.finditer(text):
+        op, subj_raw, num = m.groups()
+        if op:
             if out and out[-1] not in ("AND", "OR"):
-                out.append(part)
+                out.append(op)
+            in_use = False
             continue
-        m = clause_re.search(part)
-        if not m: continue
-        subj_raw, num = m.groups()
-        key = re.sub(r"\s+", "", subj_raw)
+        if in_use: continue    # only the first clause between two operators counts
+        in_use = True
+        key = SPACE_RE.sub("", subj_raw)
         code = desc2code.get(key, key[:4])
         candidate = f"{code}{num.upper()}"
         if candidate != course_code:
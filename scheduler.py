@@ -24,14 +24,31 @@ NEW in this version
 """
 
 from __future__ import annotations
-import json, re
+import re
+import sys
 from typing import List, Dict, Any, Set
 
 
+# build_schedule searches the top max(MIN_SEARCH_SET, SEARCH_SET_PER_SLOT *
+# max_load) candidates by score first (all of them only if that leaves a slot empty)
+SEARCH_SET_PER_SLOT = 8
+MIN_SEARCH_SET      = 32
+
+
 # ─── helpers ──────────────────────────────────────────────────────────
+# Banner times are 4-digit HHMM, so every valid one is a key here
+_HHMM_TO_MIN = {f"{h:02d}{m:02d}": h * 60 + m for h in range(24) for m in range(60)}
+
+
 def _parse_minutes(t: str | None) -> int | None:
     """'1330' → 810 minutes. None if blank/invalid."""
-    return int(t[:2]) * 60 + int(t[2:]) if t and t.isdigit() and len(t) >= 4 else None
+    if not t:
+        return None
+    minutes = _HHMM_TO_MIN.get(t)
+    if minutes is not None:
+        return minutes
+    # anything off the table (e.g. '2400', 5+ digits) keeps the old arithmetic
+    return int(t[:2]) * 60 + int(t[2:]) if t.isdigit() and len(t) >= 4 else None
 
 
 def _days_str(sec: dict) -> str:
@@ -46,13 +63,31 @@ def _days_str(sec: dict) -> str:
     return "".join(letter for letter, flag in flags if flag) or ""
 
 
-def _overlap(a: dict, b: dict) -> bool:
+def _units(sec: dict) -> int:
+    """creditHours as int; 4 if missing/null (or the older "None" string)."""
+    try:
+        return int(sec.get("creditHours", 4))
+    except (TypeError, ValueError):
+        return 4
+
+
+def _day_mask(sec: dict) -> int:
+    """Day flags → bit mask (M=1, T=2, W=4, R=8, F=16); 0 if no days."""
+    return (bool(sec.get("meeting_meetingMonday"))
+            | bool(sec.get("meeting_meetingTuesday"))   << 1
+            | bool(sec.get("meeting_meetingWednesday")) << 2
+            | bool(sec.get("meeting_meetingThursday"))  << 3
+            | bool(sec.get("meeting_meetingFriday"))    << 4)
+
+
+def _overlap(day_a: int, start_a: int | None, end_a: int | None,
+             day_b: int, start_b: int | None, end_b: int | None) -> bool:
     """Detect day & time clash between two sections."""
-    if not a["days"] or not b["days"]:
-        return False
-    if not set(a["days"]) & set(b["days"]):
+    if not day_a & day_b:
         return False
-    return a["start"] < b["end"] and b["start"] < a["end"]
+    if None in (start_a, end_a, start_b, end_b):
+        return False   # days listed but no times → can't tell, treat like TBA
+    return start_a < end_b and start_b < end_a
 
 
 def _prereq_met(prereq_matrix: list[list[str]], completed: Set[str]) -> bool:
@@ -60,13 +95,13 @@ def _prereq_met(prereq_matrix: list[list[str]], completed: Set[str]) -> bool:
     Banner prereqs are list-of-OR lists:
         [['CS010C'], ['CS111'], ['MATH009C', 'MATH09H']]
     True iff each inner list has at least ONE item in `completed`.
+    A "nan" item (clean_data.py's marker for "no prerequisites") satisfies
+    its list, as it does in courseRanking.prereqs_fullfilled.
     """
-    if not prereq_matrix:
+    if not prereq_matrix:   # None ("prerequisites": null) or empty
         return True
-    for or_block in prereq_matrix:
-        if not any(c in completed for c in or_block if c != "nan"):
-            return False
-    return True
+    return all(any(c == "nan" or c in completed for c in or_block)
+               for or_block in prereq_matrix)
 
 
 # ─── core scheduler ───────────────────────────────────────────────────
@@ -84,64 +119,126 @@ def build_schedule(
     """
 
     clean: List[dict] = []
+    seen_slots: set = set()
     for raw in sections:
         # 1️⃣  Skip non-lecture meeting types early
         if (raw.get("meeting_meetingTypeDescription") or "").lower() != "lecture":
             continue
 
-        code = raw["subjectCourse"].strip().upper()
+        # interned so the pairwise same-course checks below compare by identity
+        code = sys.intern(raw["subjectCourse"].strip().upper())
         if code not in wish_scores or code in completed:
             continue
+        # `completed` is fixed for the whole search, so check prereqs once here
+        if not _prereq_met(raw.get("prerequisites", []), completed):
+            continue
 
         sec = {
             "raw":   raw,
             "code":  code,
             "score": wish_scores[code],
-            "units": int(raw.get("creditHours", 4)),
-            "days":  _days_str(raw),
+            "units": _units(raw),
+            "day_mask": _day_mask(raw),
             "start": _parse_minutes(raw.get("meeting_meetingBeginTime")),
             "end":   _parse_minutes(raw.get("meeting_meetingEndTime")),
-            "prereq": raw.get("prerequisites", []),
         }
+        # Score is per course, so another lecture of the same course in the
+        # same slot with the same units can never do better than the first
+        # one; keep only the first and don't search the copies.
+        slot = (code, sec["day_mask"], sec["start"], sec["end"], sec["units"])
+        if slot in seen_slots:
+            continue
+        seen_slots.add(slot)
         clean.append(sec)
 
     clean.sort(key=lambda s: s["score"], reverse=True)
 
-    best_sched: list[dict] = []
-    best_score = -1
+    def search(n: int) -> list[int]:
+        """Best schedule (indices into `clean`) using only the top n candidates."""
+        # Flatten to parallel lists indexed by position in `clean`, and give each
+        # candidate a bitmask of the candidates it can never be combined with
+        # (same course or a day/time clash). Neither the pairwise pass nor dfs
+        # touches the section dicts again; dfs tracks a single `blocked` int
+        # instead of rescanning every chosen section per candidate.
+        cands     = clean[:n]
+        code_of   = [s["code"] for s in cands]
+        day_of    = [s["day_mask"] for s in cands]
+        start_of  = [s["start"] for s in cands]
+        end_of    = [s["end"] for s in cands]
+        units_of  = [s["units"] for s in cands]
+        score_of  = [s["score"] for s in cands]
+        conflicts = [0] * n
+        for i in range(n):
+            code_i, day_i, start_i, end_i = code_of[i], day_of[i], start_of[i], end_of[i]
+            for j in range(i + 1, n):
+                if code_i == code_of[j] or _overlap(day_i, start_i, end_i,
+                                                    day_of[j], start_of[j], end_of[j]):
+                    conflicts[i] |= 1 << j
+                    conflicts[j] |= 1 << i
+
+        # Branch-and-bound: `clean` is sorted by score, so the most a branch whose
+        # next pick is i can still add with up to k more picks is the next k
+        # (non-negative) scores, i.e. prefix[i + k] - prefix[i]. Branches that
+        # can't beat the best schedule found so far are cut (with a little slack
+        # for float rounding).
+        prefix = [0.0]
+        for sc in score_of:
+            prefix.append(prefix[-1] + max(sc, 0))
+        prefix += [prefix[-1]] * max_load   # so prefix[i + k] never runs off the end
+
+        # k is also capped by the units left: from candidate i on, no pick is
+        # smaller than min_units_from[i], so at most room // min_units_from[i]
+        # more sections fit.
+        min_units_from = units_of + [max_units + 1]
+        for i in range(n - 2, -1, -1):
+            min_units_from[i] = min(min_units_from[i], min_units_from[i + 1])
+
+        best_sched: list[int] = []
+        best_score = -1
 
-    def dfs(idx: int, chosen: list[dict], units: int, score: float):
-        nonlocal best_sched, best_score
-        if len(chosen) <= max_load and min_units <= units <= max_units and score > best_score:
-            best_sched = chosen[:]
-            best_score = score
-        if idx == len(clean) or len(chosen) == max_load:
-            return
+        def dfs(idx: int, chosen: list[int], blocked: int, units: int, score: float):
+            nonlocal best_sched, best_score
+            if len(chosen) <= max_load and min_units <= units <= max_units and score > best_score:
+                best_sched = chosen[:]
+                best_score = score
+            if idx == n or len(chosen) == max_load:
+                return
+            remaining = max_load - len(chosen)
+            if min_units_from[idx] > 0:
+                remaining = min(remaining, (max_units - units) // min_units_from[idx])
 
-        for i in range(idx, len(clean)):
-            cand = clean[i]
+            for i in range(idx, n):
+                # 2️⃣  Skip if this course already selected (avoid duplicates) or clashes
+                if blocked >> i & 1:
+                    continue
+                # scores only fall from here on, so once picking i can't win, nothing later can
+                if score + prefix[i + remaining] - prefix[i] + 1e-9 <= best_score:
+                    break
+                if units + units_of[i] > max_units:
+                    continue
 
-            # 2️⃣  Skip if this course already selected (avoid duplicates)
-            if any(s["code"] == cand["code"] for s in chosen):
-                continue
-            if units + cand["units"] > max_units:
-                continue
-            if not _prereq_met(cand["prereq"], completed):
-                continue
-            if any(_overlap(cand, s) for s in chosen):
-                continue
+                chosen.append(i)
+                dfs(i + 1, chosen, blocked | conflicts[i], units + units_of[i], score + score_of[i])
+                chosen.pop()
 
-            chosen.append(cand)
-            dfs(i + 1, chosen, units + cand["units"], score + cand["score"])
-            chosen.pop()
+        dfs(0, [], 0, 0, 0)
+        return best_sched
 
-    dfs(0, [], 0, 0)
-    return [s["raw"] for s in best_sched]
+    # Only max_load sections come back and every score is per course, so a
+    # long wish list's tail rarely makes the best schedule. Search just the
+    # top candidates first, and fall back to all of them only if that can't
+    # fill every slot.
+    top_k = max(MIN_SEARCH_SET, SEARCH_SET_PER_SLOT * max_load)
+    best = search(min(len(clean), top_k))
+    if len(best) < max_load and len(clean) > top_k:
+        best = search(len(clean))
+    return [clean[i]["raw"] for i in best]
 
 
 # ─── optional CLI smoke test ──────────────────────────────────────────
 if __name__ == "__main__":
-    import argparse, sys
+    import argparse
+    import orjson
     p = argparse.ArgumentParser(description="Quick test scheduler.")
     p.add_argument("--json", required=True, help="ucr_courses_data.json")
     p.add_argument("--scores", required=True, help="JSON map {course: score}")
@@ -149,8 +246,10 @@ if __name__ == "__main__":
     p.add_argument("--load", type=int, default=4)
     args = p.parse_args()
 
-    sections = json.load(open(args.json))
-    wish_scores = json.load(open(args.scores))
+    with open(args.json, "rb") as f:
+        sections = orjson.loads(f.read())
+    with open(args.scores, "rb") as f:
+        wish_scores = orjson.loads(f.read())
     completed = {c.strip().upper() for c in args.completed.split(",") if c.strip()}
 
     sched = build_schedule(sections, wish_scores, completed, max_load=args.load)
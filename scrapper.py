@@ -1,15 +1,27 @@
 # ───────────────────────── scrapper.py ─────────────────────────
-import csv, re, requests
-from typing import Dict, List, Any
-from bs4 import BeautifulSoup
+import csv, html as htmllib, re, requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Any, Tuple
+from urllib3.util.retry import Retry
+
+import orjson
 
 TERM         = "202440"                                 # Fall-24
 CSV_FILENAME = f"ucr_courses_{TERM}.csv"
 HEADERS      = {"Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"}
+BANNER_WORKERS = 32                                     # concurrent requests to Banner
+PAGE_SIZE    = 500                                      # sections per search page
 
 # ---------- Banner helpers ----------
 def banner_session(term: str) -> requests.Session:
     s = requests.Session()
+    # retry transient 5xx on GETs; one keep-alive connection per worker
+    # instead of urllib3's default 10
+    adapter = HTTPAdapter(pool_maxsize=BANNER_WORKERS,
+                          max_retries=Retry(total=3, backoff_factor=0.5,
+                                            status_forcelist=(500, 502, 503, 504)))
+    s.mount("https://", adapter)
     s.post(
         "https://registrationssb.ucr.edu/StudentRegistrationSsb/ssb/term/search?mode=search",
         data={"term": term}, headers=HEADERS, timeout=30
@@ -17,31 +29,48 @@ def banner_session(term: str) -> requests.Session:
     return s
 
 def banner_sections(s: requests.Session, term: str) -> List[Dict[str, Any]]:
-    sections, offset = [], 0
-    while True:
+    def page(offset: int) -> Dict[str, Any]:
         url = ("https://registrationssb.ucr.edu/StudentRegistrationSsb/ssb/"
                "searchResults/searchResults"
-               f"?txt_term={term}&pageOffset={offset}&pageMaxSize=500"
+               f"?txt_term={term}&pageOffset={offset}&pageMaxSize={PAGE_SIZE}"
                "&sortColumn=subjectDescription&sortDirection=asc")
-        batch = s.get(url, headers=HEADERS, timeout=30).json()["data"]
-        if not batch:
-            break
-        sections.extend(batch)
-        offset += 500
+        return orjson.loads(s.get(url, headers=HEADERS, timeout=30).content)
+
+    # first page tells us the total, then the other offsets go out in parallel
+    first    = page(0)
+    sections = list(first["data"] or [])
+    if not first.get("totalCount"):
+        # no total to plan with, so page until an empty batch as before
+        batch, offset = first["data"], PAGE_SIZE
+        while batch:
+            batch = page(offset)["data"]
+            sections.extend(batch or [])
+            offset += PAGE_SIZE
+        return sections
+    offsets  = range(PAGE_SIZE, first["totalCount"], PAGE_SIZE)
+    with ThreadPoolExecutor(BANNER_WORKERS) as ex:
+        for resp in ex.map(page, offsets):   # map keeps page order
+            sections.extend(resp["data"] or [])
     return sections
 
 # ---------- build long-name → 4-letter map ----------
 def build_desc2code(sections: List[Dict[str, Any]]) -> Dict[str, str]:
-    mapping = {}
-    for sec in sections:
-        code = sec["subject"].strip().upper()
-        desc = sec["subjectDescription"].strip()
-        if desc:
-            mapping[re.sub(r"\s+", "", desc.upper())] = code   # "COMPUTERSCIENCE" → "CS"
-    return mapping
+    # ~100 subjects across thousands of sections → normalize each distinct pair once
+    pairs = dict.fromkeys((sec["subjectDescription"], sec["subject"]) for sec in sections)
+    return {"".join(desc.upper().split()): subj.strip().upper()   # "COMPUTERSCIENCE" → "CS"
+            for desc, subj in pairs if desc.strip()}
 
 # ---------- prerequisite extractor ----------
-CLAUSE_RE = re.compile(r"([A-Z][A-Z &]{1,})\s*(\d{1,4}[A-Z]?)")
+# Banner's prereq fragment is a bare table, so dropping the tags is enough;
+# a run of tags and whitespace becomes one space in the same pass
+TEXT_GAP_RE = re.compile(r"(?:<[^>]+>|\s)+")
+# "COURSE OR TEST:" labels are cut out first, gluing their neighbours as before
+COURSE_TEST_RE = re.compile(r"\bCOURSE\s+OR\s+TEST\b:?")
+# Then one sweep over the text, leftmost match first: a whitespace-delimited
+# AND/OR, or a "SUBJECT 123A" clause whose subject never runs across one
+TOKEN_RE = re.compile(r"(?<=\s)(AND|OR)(?=\s)"
+                      r"|([A-Z](?:(?!\s(?:AND|OR)\s)[A-Z &])+)\s*(\d{1,4}[A-Z]?)")
+SPACE_RE = re.compile(r"\s+")
 
 def extract_prereq_string(sess, term, crn, desc2code, course_code):
     url = ("https://registrationssb.ucr.edu/StudentRegistrationSsb/ssb/"
@@ -52,28 +81,30 @@ def extract_prereq_string(sess, term, crn, desc2code, course_code):
             return ""
 
         # ─── start of section you REPLACE ───
-        text = BeautifulSoup(html, "html.parser").get_text(" ", strip=True).upper()
-        # keep original strip: remove only "COURSE OR TEST:"
-        text = re.sub(r"\bCOURSE\s+OR\s+TEST\b[:]?", "", text)
-
-        parts  = re.split(r"\s+(AND|OR)\s+", text)      # split but keep ops
+        # text nodes joined by single spaces, as get_text(" ", strip=True) gave
+        text = TEXT_GAP_RE.sub(" ", html)
+        if "&" in text:    # entities such as &nbsp; can decode to more whitespace
+            text = " ".join(htmllib.unescape(text).split())
+        text = text.strip().upper()
+        if "COURSE" in text:
+            text = COURSE_TEST_RE.sub("", text)
         tokens = []
-        for part in parts:
-            part = part.strip()
-            if part in ("AND", "OR"):
+        seen   = {course_code}    # courses already emitted (or self), O(1) to check
+        for m in TOKEN_RE.finditer(text):
+            op, subj_raw, num = m.groups()
+            if op:
                 if tokens and tokens[-1] not in ("AND", "OR"):
-                    tokens.append(part)
+                    tokens.append(op)
                 continue
 
-            # ← use finditer so **all** course tokens in this clause are captured
-            for m in CLAUSE_RE.finditer(part):
-                subj_raw, num = m.groups()
-                key  = re.sub(r"\s+", "", subj_raw)
-                code = desc2code.get(key, key[:4])
-                cand = f"{code}{num.upper()}"
+            # every course token between two operators is captured
+            key  = SPACE_RE.sub("", subj_raw)
+            code = desc2code.get(key, key[:4])
+            cand = f"{code}{num.upper()}"
 
-                if cand != course_code and cand not in tokens:
-                    tokens.append(cand)
+            if cand not in seen:
+                seen.add(cand)
+                tokens.append(cand)
 
         if tokens and tokens[-1] in ("AND", "OR"):
             tokens.pop()
@@ -89,9 +120,11 @@ def extract_prereq_string(sess, term, crn, desc2code, course_code):
 def write_csv(rows: List[Dict[str, Any]], filename: str):
     fieldnames = sorted({k for r in rows for k in r})
     with open(filename, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        w.writerows(rows)
+        # fieldnames covers every key, so skip DictWriter's per-row extra-key
+        # check and hand csv.writer the values in header order ("" if missing)
+        w = csv.writer(f)
+        w.writerow(fieldnames)
+        w.writerows([r.get(k, "") for k in fieldnames] for r in rows)
     print(f"✅  {len(rows)} sections → {filename}")
 
 # ---------- main ----------
@@ -100,10 +133,23 @@ def main():
     sections  = banner_sections(sess, TERM)
     desc2code = build_desc2code(sections)
 
+    # Prereqs are set per course, not per section (every section of a course
+    # carries the same string in the scraped data), so fetch one
+    # representative CRN per (subject, courseNumber) and share the result
+    first_of: Dict[Tuple[str, str], Dict[str, Any]] = {}
     for sec in sections:
+        first_of.setdefault((sec["subject"], sec["courseNumber"]), sec)
+
+    # one blocking GET per course, so the wait is all network → fan out on threads
+    def prereqs(sec):
         crn  = sec["courseReferenceNumber"]
         code = f"{sec['subject'].strip().upper()}{sec['courseNumber']}"
-        sec["prerequisites"] = extract_prereq_string(sess, TERM, crn, desc2code, code)
+        return extract_prereq_string(sess, TERM, crn, desc2code, code)
+
+    with ThreadPoolExecutor(BANNER_WORKERS) as ex:
+        prereq_of = dict(zip(first_of, ex.map(prereqs, first_of.values())))
+    for sec in sections:
+        sec["prerequisites"] = prereq_of[(sec["subject"], sec["courseNumber"])]
 
     write_csv(sections, CSV_FILENAME)
 
@@ -1,6 +1,12 @@
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from openai import AzureOpenAI
-import json
+import hashlib
+import orjson
 import os
+import sqlite3
+import sys
 
 client = AzureOpenAI(
   azure_endpoint = os.environ["AZURE_OPENAI_ENDPOINT"], 
@@ -9,6 +15,9 @@ client = AzureOpenAI(
 )
 deployment= "text-embedding-3-small"
 JSON_FILE_PATH = "ucr_courses_data.json"
+EMBED_BATCH_SIZE = 256 # texts sent per embeddings.create call
+EMBED_WORKERS = 8 # batches in flight at once
+CACHE_DB_PATH = "emb_cache.sqlite" # embeddings of texts seen in earlier runs
 
 
 def get_embedding(text, model="text-embedding-3-small"):
@@ -18,31 +27,88 @@ def get_embedding(text, model="text-embedding-3-small"):
         response = client.embeddings.create(input=text, model=deployment)
         return response.data[0].embedding
     except:
-        print(f"Error calling Azure OpenAI:")
+        print(f"Error calling Azure OpenAI:", file=sys.stderr)
         return ""
 
+def get_embeddings(texts):
+    """
+    Embeds a list of texts with one request, in input order. If the batch
+    call fails, each text is retried on its own via get_embedding.
+    """
+    texts = [text.replace("\n", " ") for text in texts]
+    try:
+        response = client.embeddings.create(input=texts, model=deployment)
+        # the API tags each item with its input position
+        return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+    except Exception:
+        print(f"Error calling Azure OpenAI for a batch of {len(texts)}; retrying one by one", file=sys.stderr)
+        return [get_embedding(text) for text in texts]
+
+def _text_key(text):
+    # Keyed on the deployment too, so switching models never serves stale vectors
+    return hashlib.sha1(f"{deployment}\n{text}".encode()).hexdigest()
+
+def open_embedding_cache(path=CACHE_DB_PATH):
+    """Opens (creating if needed) the sqlite cache of {sha1(deployment, text): embedding}."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, embedding BLOB)")
+    return conn
+
+def cached_embeddings(conn, texts):
+    """Embeddings for the texts that are already in the cache, as {text: list}."""
+    found = {}
+    for text in texts:
+        row = conn.execute("SELECT embedding FROM embeddings WHERE hash = ?", (_text_key(text),)).fetchone()
+        if row:
+            found[text] = array('d', row[0]).tolist()
+    return found
+
+def store_embeddings(conn, embeddings):
+    """Adds {text: embedding} to the cache; failed ("") embeddings are not kept."""
+    conn.executemany(
+        "INSERT OR REPLACE INTO embeddings (hash, embedding) VALUES (?, ?)",
+        [(_text_key(text), array('d', emb).tobytes()) for text, emb in embeddings.items() if emb])
+    conn.commit()
+
 def getVector():
 
     try:
-        with open(JSON_FILE_PATH, 'r', encoding='utf-8') as f:
-            courses_data = json.load(f)
+        with open(JSON_FILE_PATH, 'rb') as f:
+            courses_data = orjson.loads(f.read())
         #print(f"Successfully loaded {len(courses_data)} course records from {JSON_FILE_PATH}")
     except FileNotFoundError:
-        print(f"Error: The file '{JSON_FILE_PATH}' was not found. Please ensure it's in the correct directory.")
+        print(f"Error: The file '{JSON_FILE_PATH}' was not found. Please ensure it's in the correct directory.", file=sys.stderr)
 
 
     embeddings_data = []
-    count = 0
-    for course in courses_data:
-        text = f"{course['subjectCourse']} {course['courseTitle']}"
+    texts = [f"{course['subjectCourse']} {course['courseTitle']}" for course in courses_data]
+
+    # Every section of a course shares its text, and titles rarely change between
+    # runs, so only texts that are new to the on-disk cache go to the API
+    with closing(open_embedding_cache()) as conn:
+        unique_texts = list(dict.fromkeys(texts))
+        embeddings = cached_embeddings(conn, unique_texts)
+        missing = [text for text in unique_texts if text not in embeddings]
+
+        # one round trip per EMBED_BATCH_SIZE texts instead of one per course, with
+        # several batches in flight since each call is mostly waiting on the network
+        chunks = [missing[i:i + EMBED_BATCH_SIZE] for i in range(0, len(missing), EMBED_BATCH_SIZE)]
+        with ThreadPoolExecutor(EMBED_WORKERS) as pool:
+            fresh = dict(zip(missing, (e for batch in pool.map(get_embeddings, chunks) for e in batch)))
+        store_embeddings(conn, fresh)
+        embeddings.update(fresh)
 
-        embedding = get_embedding(text)
+    for course, text in zip(courses_data, texts):
         embeddings_data.append({
             "course_id": course['subjectCourse'], # Or your unique section ID
             "text": text,
-            "embedding": embedding
+            "embedding": embeddings[text]
         })
 
     return embeddings_data
 
-print(getVector())
\ No newline at end of file
+if __name__ == "__main__":
+    # Dump as JSON (not the Python repr) so add_embeddings.py can stream
+    # vectors.txt directly instead of migrating it with ast.literal_eval first.
+    # stdout carries only this payload; diagnostics above go to stderr.
+    print(orjson.dumps(getVector()).decode())